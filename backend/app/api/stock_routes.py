@@ -1,12 +1,37 @@
 from fastapi import APIRouter, HTTPException, Query, BackgroundTasks
+from fastapi.responses import ORJSONResponse, Response
+from fastapi_cache import FastAPICache
+from fastapi_cache.coder import Coder
+from fastapi_cache.decorator import cache
 from typing import Dict, Optional
 from datetime import datetime, timedelta
+import hashlib
+import pandas as pd
+from ..config import CACHE_EXPIRY, CURRENT_PRICE_CACHE_EXPIRY
 from ..services.stock_service import StockService
 
 router = APIRouter(prefix="/api/stock", tags=["stock"])
 stock_service = StockService()
 
+def range_key_builder(func, namespace: str = "", request=None, response=None, args=(), kwargs=None):
+    """Cache key from the query parameters that select the data range"""
+    kwargs = kwargs or {}
+    params = tuple(str(kwargs.get(name)) for name in ("period", "interval", "start_date", "end_date"))
+    digest = hashlib.md5(repr(params).encode()).hexdigest()
+    return f"{FastAPICache.get_prefix()}:{namespace}:{func.__module__}:{func.__name__}:{digest}"
+
+class RawJSONCoder(Coder):
+    """Cache pre-serialized JSON bodies and replay them without re-encoding"""
+    @classmethod
+    def encode(cls, value: Response) -> bytes:
+        return value.body
+
+    @classmethod
+    def decode(cls, value: bytes) -> Response:
+        return Response(content=value, media_type="application/json")
+
 @router.get("/current")
+@cache(expire=CURRENT_PRICE_CACHE_EXPIRY, key_builder=range_key_builder)
 async def get_current_price():
     """Get current Tesla stock price and basic info"""
     try:
@@ -15,6 +40,7 @@ async def get_current_price():
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/historical")
+@cache(expire=CACHE_EXPIRY, key_builder=range_key_builder, coder=RawJSONCoder)
 async def get_historical_data(
     period: str = "1y",
     interval: str = "1d"
@@ -22,11 +48,22 @@ async def get_historical_data(
     """Get historical Tesla stock data"""
     try:
         data = await stock_service.get_historical_data(period, interval)
-        return data.to_dict(orient="records")
+        # Timestamps are rendered with isoformat() first so they keep the
+        # exchange-local offset; to_json's iso mode would convert them to UTC
+        timestamps = {
+            column: data[column].map(pd.Timestamp.isoformat)
+            for column in data.select_dtypes(include=["datetime", "datetimetz"]).columns
+        }
+        # Encode straight from the DataFrame instead of building a dict per row
+        return Response(
+            content=data.assign(**timestamps).to_json(orient="records"),
+            media_type="application/json"
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/metrics")
+@cache(expire=CACHE_EXPIRY, key_builder=range_key_builder)
 async def get_stock_metrics(period: str = "1y"):
     """Get calculated financial metrics"""
     try:
@@ -39,15 +76,22 @@ async def get_stock_metrics(period: str = "1y"):
 @router.get("/monte-carlo")
 async def run_monte_carlo(
     days: int = 252,
-    simulations: int = 1000
+    simulations: int = 256
 ):
-    """Run Monte Carlo simulation"""
+    """Run Monte Carlo simulation.
+
+    On CPU the path count is rounded up to the next power of two (e.g. 1000
+    runs 1024 paths); the response's "simulation_count" is the real count.
+    """
     try:
-        return await stock_service.run_monte_carlo(days, simulations)
+        # Returned directly so orjson serializes the NumPy arrays without a
+        # jsonable_encoder pass
+        return ORJSONResponse(await stock_service.run_monte_carlo(days, simulations))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/technical-indicators")
+@cache(expire=CACHE_EXPIRY, key_builder=range_key_builder)
 async def get_technical_indicators(
     start_date: datetime = Query(default=None),
     end_date: datetime = Query(default=None)
@@ -59,16 +103,13 @@ async def get_technical_indicators(
         if not end_date:
             end_date = datetime.now()
         
-        data = await stock_service.get_historical_data(
-            period=f"{(end_date - start_date).days}d",
-            interval="1d"
-        )
-        metrics = await stock_service.calculate_metrics(data)
-        return metrics['technical_indicators']
+        metrics = await stock_service.metrics_for_range(start_date, end_date)
+        return {'dates': metrics['dates'], **metrics['technical_indicators']}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/volatility-metrics")
+@cache(expire=CACHE_EXPIRY, key_builder=range_key_builder)
 async def get_volatility_metrics(
     start_date: datetime = Query(default=None),
     end_date: datetime = Query(default=None)
@@ -80,16 +121,13 @@ async def get_volatility_metrics(
         if not end_date:
             end_date = datetime.now()
         
-        data = await stock_service.get_historical_data(
-            period=f"{(end_date - start_date).days}d",
-            interval="1d"
-        )
-        metrics = await stock_service.calculate_metrics(data)
-        return metrics['volatility_metrics']
+        metrics = await stock_service.metrics_for_range(start_date, end_date)
+        return {'dates': metrics['dates'], **metrics['volatility_metrics']}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/market-regime")
+@cache(expire=CACHE_EXPIRY, key_builder=range_key_builder)
 async def get_market_regime(
     start_date: datetime = Query(default=None),
     end_date: datetime = Query(default=None)
@@ -101,16 +139,13 @@ async def get_market_regime(
         if not end_date:
             end_date = datetime.now()
         
-        data = await stock_service.get_historical_data(
-            period=f"{(end_date - start_date).days}d",
-            interval="1d"
-        )
-        metrics = await stock_service.calculate_metrics(data)
-        return metrics['market_regime']
+        metrics = await stock_service.metrics_for_range(start_date, end_date)
+        return {'dates': metrics['dates'], 'regime': metrics['market_regime']}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/historical-analysis")
+@cache(expire=CACHE_EXPIRY, key_builder=range_key_builder)
 async def get_historical_analysis(
     start_date: datetime = Query(default=None),
     end_date: datetime = Query(default=None)
@@ -151,6 +186,6 @@ async def get_ml_predictions():
 async def get_combined_analysis():
     """Get combined analysis including ML predictions"""
     try:
-        return await stock_service.get_combined_analysis()
+        return ORJSONResponse(await stock_service.get_combined_analysis())
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
@@ -53,4 +53,7 @@ CORS_ORIGINS = [
 ]
 
 # Cache configuration
-CACHE_EXPIRY = 3600  # 1 hour in seconds 
\ No newline at end of file
+CACHE_EXPIRY = 3600  # 1 hour in seconds
+CURRENT_PRICE_CACHE_EXPIRY = 60  # Quotes go stale faster than daily bars
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
+CACHE_DIR = Path(os.getenv("CACHE_DIR", BASE_DIR / ".cache")) 
\ No newline at end of file
@@ -1,14 +1,18 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.redis import RedisBackend
+from redis import asyncio as aioredis
 import uvicorn
-from app.config import CORS_ORIGINS
+from app.config import CORS_ORIGINS, REDIS_URL
 from app.models.database import init_db
 
 app = FastAPI(
     title="Tesla Stock Analysis API",
     description="API for Tesla stock analysis, Monte Carlo simulations, and market predictions",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Configure CORS
@@ -24,6 +28,8 @@ app.add_middleware(
 @app.on_event("startup")
 async def startup_event():
     init_db()
+    redis = aioredis.from_url(REDIS_URL)
+    FastAPICache.init(RedisBackend(redis), prefix="tsla")
 
 @app.get("/")
 async def root():
@@ -1,7 +1,11 @@
-from sqlalchemy import create_engine, Column, Integer, Float, String, DateTime, ForeignKey
+from sqlalchemy import create_engine, Column, Integer, Float, String, DateTime, ForeignKey, LargeBinary
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.orm import sessionmaker, relationship, Session, load_only
+from sqlalchemy.pool import StaticPool
 from datetime import datetime
+import threading
+import numpy as np
+from typing import Iterator, List, Optional, Sequence
 from app.config import DATABASE_URL
 
 Base = declarative_base()
@@ -10,7 +14,7 @@ class StockPrice(Base):
     __tablename__ = "stock_prices"
 
     id = Column(Integer, primary_key=True)
-    date = Column(DateTime, nullable=False)
+    date = Column(DateTime, nullable=False, index=True)
     open = Column(Float, nullable=False)
     high = Column(Float, nullable=False)
     low = Column(Float, nullable=False)
@@ -22,7 +26,7 @@ class TechnicalIndicator(Base):
     __tablename__ = "technical_indicators"
 
     id = Column(Integer, primary_key=True)
-    date = Column(DateTime, nullable=False)
+    date = Column(DateTime, nullable=False, index=True)
     rsi = Column(Float)
     macd = Column(Float)
     macd_signal = Column(Float)
@@ -36,7 +40,7 @@ class VolatilityMetric(Base):
     __tablename__ = "volatility_metrics"
 
     id = Column(Integer, primary_key=True)
-    date = Column(DateTime, nullable=False)
+    date = Column(DateTime, nullable=False, index=True)
     historical_volatility = Column(Float)
     parkinson_volatility = Column(Float)
     garman_klass_volatility = Column(Float)
@@ -46,7 +50,7 @@ class MarketRegime(Base):
     __tablename__ = "market_regimes"
 
     id = Column(Integer, primary_key=True)
-    date = Column(DateTime, nullable=False)
+    date = Column(DateTime, nullable=False, index=True)
     regime = Column(String(50))
     probability = Column(Float)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -55,57 +59,142 @@ class MLPrediction(Base):
     __tablename__ = "ml_predictions"
 
     id = Column(Integer, primary_key=True)
-    date = Column(DateTime, nullable=False)
+    date = Column(DateTime, nullable=False, index=True)
     predicted_price = Column(Float)
     confidence = Column(Float)
     model_type = Column(String(50))
     created_at = Column(DateTime, default=datetime.utcnow)
 
-def get_db_connection():
-    engine = create_engine(DATABASE_URL)
-    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+class MonteCarloSimulation(Base):
+    __tablename__ = "monte_carlo_simulations"
+
+    id = Column(Integer, primary_key=True)
+    date = Column(DateTime, nullable=False, index=True)
+    simulation_date = Column(DateTime)
+    # Paths are stored as raw float32 bytes; decode with decode_path()
+    mean_path = Column(LargeBinary)
+    upper_bound = Column(LargeBinary)
+    lower_bound = Column(LargeBinary)
+    confidence_interval = Column(Float)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+def encode_path(path) -> bytes:
+    """Pack a price path as float32 bytes"""
+    return np.asarray(path, dtype=np.float32).tobytes()
+
+def decode_path(blob: bytes) -> np.ndarray:
+    """Inverse of encode_path; returns a read-only float32 array"""
+    return np.frombuffer(blob, dtype=np.float32)
+
+def _create_engine():
+    """Build the process-wide engine (one connection pool per process)"""
+    kwargs = {"pool_pre_ping": True, "future": True}
+    if DATABASE_URL.startswith("sqlite"):
+        kwargs["connect_args"] = {"check_same_thread": False}
+        if DATABASE_URL in ("sqlite://", "sqlite:///:memory:"):
+            # An in-memory database only lives as long as its connection
+            kwargs["poolclass"] = StaticPool
+    return create_engine(DATABASE_URL, **kwargs)
+
+# Module import is serialized by the import lock, so these are built exactly once
+engine = _create_engine()
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def get_db_connection() -> Session:
     return SessionLocal()
 
+def get_db() -> Iterator[Session]:
+    """FastAPI dependency yielding a request-scoped session"""
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
 def init_db():
-    engine = create_engine(DATABASE_URL)
     Base.metadata.create_all(bind=engine)
+    # create_all skips tables that already exist, so add indexes introduced later
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
 
 # Database operations
 class DatabaseOperations:
-    def __init__(self):
-        self.session = get_db_connection()
+    def __init__(self, session: Optional[Session] = None):
+        self.session = session if session is not None else get_db_connection()
+        # Writes are run from worker threads; a Session must not be used concurrently
+        self._lock = threading.Lock()
+
+    def _bulk_insert(self, model_class, rows: List[dict]):
+        """Insert all rows with one executemany and a single commit"""
+        if not rows:
+            return
+        with self._lock:
+            try:
+                self.session.bulk_insert_mappings(model_class, rows)
+                self.session.commit()
+            except Exception:
+                self.session.rollback()
+                raise
+
+    def save_stock_data_many(self, rows: List[dict]):
+        self._bulk_insert(StockPrice, rows)
+
+    def save_technical_indicators_many(self, rows: List[dict]):
+        self._bulk_insert(TechnicalIndicator, rows)
+
+    def save_volatility_metrics_many(self, rows: List[dict]):
+        self._bulk_insert(VolatilityMetric, rows)
+
+    def save_market_regime_many(self, rows: List[dict]):
+        self._bulk_insert(MarketRegime, rows)
+
+    def save_ml_prediction_many(self, rows: List[dict]):
+        self._bulk_insert(MLPrediction, rows)
+
+    def save_monte_carlo_simulation(self, data: dict):
+        row = dict(data)
+        for key in ('mean_path', 'upper_bound', 'lower_bound'):
+            row[key] = encode_path(row[key])
+        self._bulk_insert(MonteCarloSimulation, [row])
 
     def save_stock_data(self, data: dict):
-        stock_data = StockPrice(**data)
-        self.session.add(stock_data)
-        self.session.commit()
+        self.save_stock_data_many([data])
 
     def save_technical_indicators(self, data: dict):
-        indicators = TechnicalIndicator(**data)
-        self.session.add(indicators)
-        self.session.commit()
+        self.save_technical_indicators_many([data])
 
     def save_volatility_metrics(self, data: dict):
-        metrics = VolatilityMetric(**data)
-        self.session.add(metrics)
-        self.session.commit()
+        self.save_volatility_metrics_many([data])
 
     def save_market_regime(self, data: dict):
-        regime = MarketRegime(**data)
-        self.session.add(regime)
-        self.session.commit()
+        self.save_market_regime_many([data])
 
     def save_ml_prediction(self, data: dict):
-        prediction = MLPrediction(**data)
-        self.session.add(prediction)
-        self.session.commit()
-
-    def get_latest_data(self, model_class, limit: int = 100):
-        return self.session.query(model_class).order_by(
-            model_class.date.desc()
-        ).limit(limit).all()
-
-    def get_data_by_date_range(self, model_class, start_date: datetime, end_date: datetime):
-        return self.session.query(model_class).filter(
-            model_class.date.between(start_date, end_date)
-        ).all() 
\ No newline at end of file
+        self.save_ml_prediction_many([data])
+
+    def _query(self, model_class, columns: Optional[Sequence[str]] = None):
+        """Query a model, loading only the named columns when given"""
+        query = self.session.query(model_class)
+        if columns:
+            query = query.options(load_only(*(getattr(model_class, c) for c in columns)))
+        return query
+
+    def get_latest_data(self, model_class, limit: int = 100, columns: Optional[Sequence[str]] = None):
+        with self._lock:
+            return self._query(model_class, columns).order_by(
+                model_class.date.desc()
+            ).limit(limit).all()
+
+    def get_data_by_date_range(
+        self,
+        model_class,
+        start_date: datetime,
+        end_date: datetime,
+        columns: Optional[Sequence[str]] = None
+    ):
+        with self._lock:
+            return self._query(model_class, columns).filter(
+                model_class.date.between(start_date, end_date)
+            ).all()
+ 
\ No newline at end of file
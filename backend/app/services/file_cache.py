@@ -0,0 +1,34 @@
+import hashlib
+import os
+import time
+from pathlib import Path
+from typing import Hashable, Optional
+import pandas as pd
+
+class FileCache:
+    """TTL cache of DataFrames stored as parquet files, keyed by an MD5 of the key"""
+
+    def __init__(self, cache_dir: Path):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: Hashable) -> Path:
+        digest = hashlib.md5(repr(key).encode()).hexdigest()
+        return self.cache_dir / f"{digest}.parquet"
+
+    def get(self, key: Hashable, ttl: float) -> Optional[pd.DataFrame]:
+        """Cached frame for key, or None if missing or older than ttl seconds"""
+        path = self._path(key)
+        try:
+            if time.time() - path.stat().st_mtime > ttl:
+                return None
+            return pd.read_parquet(path)
+        except (OSError, ValueError):
+            return None
+
+    def set(self, key: Hashable, value: pd.DataFrame):
+        path = self._path(key)
+        # Write then rename so readers never see a partially written file
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        value.to_parquet(tmp_path)
+        os.replace(tmp_path, path)
@@ -1,88 +1,283 @@
 import numpy as np
 import pandas as pd
+import math
+from numba import njit
+from numpy.lib.stride_tricks import sliding_window_view
 from sklearn.preprocessing import MinMaxScaler
-from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
-from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_squared_error, r2_score
+import xgboost as xgb
 import tensorflow as tf
 from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import LSTM, Dense, Dropout
 from typing import Dict, List, Tuple
+from functools import lru_cache
 import joblib
 import os
 
+@lru_cache(maxsize=1)
+def _xgb_device() -> str:
+    """Use the GPU for tree fitting when XGBoost can reach one"""
+    try:
+        xgb.XGBRegressor(device="cuda", n_estimators=1).fit(np.zeros((2, 1)), np.zeros(2))
+        return "cuda"
+    except xgb.core.XGBoostError:
+        return "cpu"
+
+@njit(cache=True)
+def _build_features(close: np.ndarray, volume: np.ndarray) -> np.ndarray:
+    """Single pass over Close/Volume producing the model features.
+
+    Columns: Close, Returns, MA5, MA20, Volatility (20-day std of returns),
+    Volume, Volume_MA5. Rows inside a warm-up window are left as NaN. Each
+    window counts the NaNs it holds and is NaN only while that count is
+    non-zero, matching pandas rolling(); NaNs never enter the running sums.
+    """
+    n = close.shape[0]
+    out = np.full((n, 7), np.nan)
+    close_sum5 = 0.0
+    close_nan5 = 0
+    close_sum20 = 0.0
+    close_nan20 = 0
+    volume_sum5 = 0.0
+    volume_nan5 = 0
+    ret_count = 0
+    ret_nan = 0
+    ret_mean = 0.0
+    ret_m2 = 0.0
+    for i in range(n):
+        c = close[i]
+        v = volume[i]
+        out[i, 0] = c
+        out[i, 5] = v
+
+        if np.isnan(c):
+            close_nan5 += 1
+            close_nan20 += 1
+        else:
+            close_sum5 += c
+            close_sum20 += c
+        if np.isnan(v):
+            volume_nan5 += 1
+        else:
+            volume_sum5 += v
+        if i >= 5:
+            old = close[i - 5]
+            if np.isnan(old):
+                close_nan5 -= 1
+            else:
+                close_sum5 -= old
+            old = volume[i - 5]
+            if np.isnan(old):
+                volume_nan5 -= 1
+            else:
+                volume_sum5 -= old
+        if i >= 20:
+            old = close[i - 20]
+            if np.isnan(old):
+                close_nan20 -= 1
+            else:
+                close_sum20 -= old
+        if i >= 4:
+            if close_nan5 == 0:
+                out[i, 2] = close_sum5 / 5.0
+            if volume_nan5 == 0:
+                out[i, 6] = volume_sum5 / 5.0
+        if i >= 19 and close_nan20 == 0:
+            out[i, 3] = close_sum20 / 20.0
+
+        # Returns; row 0 (and any row next to a missing Close) is NaN
+        ret = close[i] / close[i - 1] - 1.0 if i >= 1 else np.nan
+        out[i, 1] = ret
+        # Welford add/remove over the trailing 20 returns, skipping NaNs
+        if np.isnan(ret):
+            ret_nan += 1
+        else:
+            ret_count += 1
+            delta = ret - ret_mean
+            ret_mean += delta / ret_count
+            ret_m2 += delta * (ret - ret_mean)
+        if i >= 20:
+            ret_old = out[i - 20, 1]
+            if np.isnan(ret_old):
+                ret_nan -= 1
+            else:
+                ret_count -= 1
+                if ret_count == 0:
+                    ret_mean = 0.0
+                    ret_m2 = 0.0
+                else:
+                    delta = ret_old - ret_mean
+                    ret_mean -= delta / ret_count
+                    ret_m2 -= delta * (ret_old - ret_mean)
+        if i >= 19 and ret_nan == 0:
+            out[i, 4] = math.sqrt(max(ret_m2, 0.0) / 19.0)
+    return out
+
+# Rows of history _build_features needs before every feature column is defined
+FEATURE_WARMUP = 20
+
+@njit(cache=True)
+def _infer_features(close: np.ndarray, volume: np.ndarray, seq_len: int = 10) -> np.ndarray:
+    """Unscaled (seq_len, 7) feature window ending at the latest row"""
+    start = close.shape[0] - (seq_len + FEATURE_WARMUP)
+    return _build_features(close[start:], volume[start:])[FEATURE_WARMUP:]
+
 class MLService:
     def __init__(self):
         self.scaler = MinMaxScaler()
+        self.X_min = None
+        self.X_scale = None
         self.models = {}
+        self.lstm_tflite = None
+        self.lstm_interpreter = None
         self.model_path = "models"
         os.makedirs(self.model_path, exist_ok=True)
 
-    def prepare_data(self, data: pd.DataFrame, sequence_length: int = 10) -> Tuple[np.ndarray, np.ndarray]:
-        """Prepare data for ML models"""
+    def set_scaling(self, scaler: MinMaxScaler):
+        """Cache the fitted min/scale so transforms skip sklearn"""
+        self.scaler = scaler
+        self.X_min = scaler.data_min_
+        self.X_scale = scaler.scale_
+
+    def prepare_data(
+        self,
+        data: pd.DataFrame,
+        sequence_length: int = 10,
+        fit: bool = False
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Prepare data for ML models.
+
+        The MinMax statistics are fitted only when ``fit`` is True (training);
+        otherwise the statistics from training are reused so inference inputs
+        are scaled exactly as the models saw them.
+        """
         # Create features
-        df = data.copy()
-        df['Returns'] = df['Close'].pct_change()
-        df['MA5'] = df['Close'].rolling(window=5).mean()
-        df['MA20'] = df['Close'].rolling(window=20).mean()
-        df['Volatility'] = df['Returns'].rolling(window=20).std()
-        df['Volume_MA5'] = df['Volume'].rolling(window=5).mean()
+        close = data['Close'].to_numpy(dtype=np.float64)
+        volume = data['Volume'].to_numpy(dtype=np.float64)
+        features = _build_features(close, volume)
         
         # Create target (next day's price)
-        df['Target'] = df['Close'].shift(-1)
-        
-        # Drop NaN values
-        df = df.dropna()
+        target = np.empty_like(close)
+        target[:-1] = close[1:]
+        target[-1] = np.nan
         
-        # Select features
-        features = ['Close', 'Returns', 'MA5', 'MA20', 'Volatility', 'Volume', 'Volume_MA5']
-        X = df[features].values
-        y = df['Target'].values
+        # Drop rows with NaN values
+        valid = ~(np.isnan(features).any(axis=1) | np.isnan(target))
+        X = features[valid]
+        y = target[valid]
         
         # Scale the data
-        X_scaled = self.scaler.fit_transform(X)
+        if fit:
+            self.set_scaling(MinMaxScaler().fit(X))
+        elif self.X_min is None:
+            raise ValueError("Scaler has not been fitted; train or load models first")
+        # float32 halves the footprint of every downstream copy and tree pass
+        X_scaled = ((X - self.X_min) * self.X_scale).astype(np.float32)
         
-        # Create sequences
-        X_seq, y_seq = [], []
-        for i in range(len(X_scaled) - sequence_length):
-            X_seq.append(X_scaled[i:(i + sequence_length)])
-            y_seq.append(y[i + sequence_length])
+        # Create sequences: windows of sequence_length rows, each paired with the
+        # target following the window
+        windows = sliding_window_view(X_scaled, sequence_length, axis=0)[:-1]
+        X_seq = np.ascontiguousarray(windows.transpose(0, 2, 1))
+        y_seq = y[sequence_length:]
         
-        return np.array(X_seq), np.array(y_seq)
+        return X_seq, y_seq
 
     def build_lstm_model(self, input_shape: Tuple[int, int]) -> tf.keras.Model:
         """Build LSTM model"""
+        # Half-precision compute only pays off on GPU tensor cores
+        if tf.config.list_physical_devices('GPU'):
+            tf.keras.mixed_precision.set_global_policy('mixed_float16')
         model = Sequential([
             LSTM(50, return_sequences=True, input_shape=input_shape),
             Dropout(0.2),
             LSTM(50, return_sequences=False),
             Dropout(0.2),
             Dense(25),
-            Dense(1)
+            # Keep the regression output in float32 for numerical stability
+            Dense(1, dtype='float32')
         ])
         model.compile(optimizer='adam', loss='mse')
         return model
 
+    def make_dataset(
+        self,
+        X: np.ndarray,
+        y: np.ndarray,
+        batch_size: int = 64,
+        shuffle: bool = False
+    ) -> tf.data.Dataset:
+        """Cached, batched and prefetched input pipeline for Keras"""
+        dataset = tf.data.Dataset.from_tensor_slices((X, y.astype(np.float32))).cache()
+        if shuffle:
+            dataset = dataset.shuffle(1024)
+        return dataset.batch(batch_size).prefetch(tf.data.AUTOTUNE)
+
+    def convert_lstm_to_tflite(self, model: tf.keras.Model) -> bytes:
+        """Convert the LSTM to TFLite with dynamic-range int8 weight quantization"""
+        converter = tf.lite.TFLiteConverter.from_keras_model(model)
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        return converter.convert()
+
+    def load_lstm_interpreter(self, model_content: bytes):
+        """Create the TFLite interpreter once so predictions skip Keras dispatch"""
+        interpreter = tf.lite.Interpreter(model_content=model_content)
+        interpreter.allocate_tensors()
+        self.lstm_interpreter = interpreter
+        self._lstm_input_index = interpreter.get_input_details()[0]['index']
+        self._lstm_output_index = interpreter.get_output_details()[0]['index']
+
+    def predict_lstm(self, sequence: np.ndarray) -> np.ndarray:
+        """Run a single (1, seq, features) sequence through the LSTM"""
+        if self.lstm_interpreter is None:
+            return self.models['lstm'].predict(sequence, verbose=0)
+        self.lstm_interpreter.set_tensor(self._lstm_input_index, sequence.astype(np.float32, copy=False))
+        self.lstm_interpreter.invoke()
+        return self.lstm_interpreter.get_tensor(self._lstm_output_index)
+
     def train_models(self, data: pd.DataFrame) -> Dict:
         """Train multiple ML models"""
         # Prepare data
-        X, y = self.prepare_data(data)
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, shuffle=False)
+        X, y = self.prepare_data(data, fit=True)
         
-        # Train Random Forest
-        rf_model = RandomForestRegressor(n_estimators=100, random_state=42)
-        rf_model.fit(X_train.reshape(X_train.shape[0], -1), y_train)
+        # Chronological split by slicing, so the splits (and the 2D views the
+        # tree models consume) share X's contiguous buffer instead of copying
+        n_train = len(X) - int(np.ceil(len(X) * 0.2))
+        X_flat = X.reshape(X.shape[0], -1)
+        X_train, X_test = X[:n_train], X[n_train:]
+        X_train_flat, X_test_flat = X_flat[:n_train], X_flat[n_train:]
+        y_train, y_test = y[:n_train], y[n_train:]
+        
+        device = _xgb_device()
+        
+        # Train Random Forest (XGBoost random-forest mode, histogram splits)
+        rf_model = xgb.XGBRFRegressor(
+            n_estimators=100, tree_method="hist", device=device,
+            subsample=0.8, colsample_bynode=0.8, n_jobs=-1, random_state=42
+        )
+        rf_model.fit(X_train_flat, y_train)
         self.models['random_forest'] = rf_model
         
         # Train Gradient Boosting
-        gb_model = GradientBoostingRegressor(n_estimators=100, random_state=42)
-        gb_model.fit(X_train.reshape(X_train.shape[0], -1), y_train)
+        gb_model = xgb.XGBRegressor(
+            n_estimators=200, max_depth=6, tree_method="hist", device=device,
+            n_jobs=-1, random_state=42
+        )
+        gb_model.fit(X_train_flat, y_train)
         self.models['gradient_boosting'] = gb_model
         
         # Train LSTM
         lstm_model = self.build_lstm_model((X_train.shape[1], X_train.shape[2]))
-        lstm_model.fit(X_train, y_train, epochs=50, batch_size=32, validation_split=0.1, verbose=0)
+        # Hold out the last 10% of the training window, as validation_split did
+        n_fit = int(len(X_train) * 0.9)
+        lstm_model.fit(
+            self.make_dataset(X_train[:n_fit], y_train[:n_fit], shuffle=True),
+            validation_data=self.make_dataset(X_train[n_fit:], y_train[n_fit:]),
+            epochs=50,
+            verbose=0
+        )
         self.models['lstm'] = lstm_model
+        self.lstm_tflite = self.convert_lstm_to_tflite(lstm_model)
+        self.load_lstm_interpreter(self.lstm_tflite)
         
         # Evaluate models
         predictions = {}
@@ -92,7 +287,7 @@ class MLService:
             if name == 'lstm':
                 pred = model.predict(X_test)
             else:
-                pred = model.predict(X_test.reshape(X_test.shape[0], -1))
+                pred = model.predict(X_test_flat)
             
             predictions[name] = pred
             metrics[name] = {
@@ -111,13 +306,27 @@ class MLService:
 
     def predict_next_day(self, data: pd.DataFrame) -> Dict:
         """Predict next day's price using all models"""
-        X, _ = self.prepare_data(data)
-        latest_sequence = X[-1:]
+        if self.X_min is None:
+            raise ValueError("Scaler has not been fitted; train or load models first")
+        
+        close = data['Close'].to_numpy(dtype=np.float64)
+        volume = data['Volume'].to_numpy(dtype=np.float64)
+        sequence_length = 10
+        if len(close) < sequence_length + FEATURE_WARMUP:
+            raise ValueError(
+                f"Need at least {sequence_length + FEATURE_WARMUP} rows of history to predict"
+            )
+        
+        # Only the window ending at the latest row is built; no DataFrame copy,
+        # rolling ops or sklearn transform on the request path
+        window = _infer_features(close, volume, sequence_length)
+        latest_sequence = ((window - self.X_min) * self.X_scale).astype(np.float32)[np.newaxis]
+        current_price = float(close[-1])
         
         predictions = {}
         for name, model in self.models.items():
             if name == 'lstm':
-                pred = model.predict(latest_sequence)
+                pred = self.predict_lstm(latest_sequence)
             else:
                 pred = model.predict(latest_sequence.reshape(1, -1))
             predictions[name] = float(pred[0])
@@ -134,8 +343,8 @@ class MLService:
         return {
             'individual_predictions': predictions,
             'ensemble_prediction': ensemble_pred,
-            'current_price': float(data['Close'].iloc[-1]),
-            'predicted_change': (ensemble_pred - float(data['Close'].iloc[-1])) / float(data['Close'].iloc[-1]) * 100
+            'current_price': current_price,
+            'predicted_change': (ensemble_pred - current_price) / current_price * 100
         }
 
     def save_models(self):
@@ -143,6 +352,9 @@ class MLService:
         for name, model in self.models.items():
             if name == 'lstm':
                 model.save(os.path.join(self.model_path, f'{name}_model.h5'))
+                if self.lstm_tflite is not None:
+                    with open(os.path.join(self.model_path, f'{name}_model.tflite'), 'wb') as f:
+                        f.write(self.lstm_tflite)
             else:
                 joblib.dump(model, os.path.join(self.model_path, f'{name}_model.joblib'))
         
@@ -161,7 +373,14 @@ class MLService:
         if os.path.exists(lstm_path):
             self.models['lstm'] = tf.keras.models.load_model(lstm_path)
         
+        # Load quantized LSTM used for inference
+        tflite_path = os.path.join(self.model_path, 'lstm_model.tflite')
+        if os.path.exists(tflite_path):
+            with open(tflite_path, 'rb') as f:
+                self.lstm_tflite = f.read()
+            self.load_lstm_interpreter(self.lstm_tflite)
+        
         # Load scaler
         scaler_path = os.path.join(self.model_path, 'scaler.joblib')
         if os.path.exists(scaler_path):
-            self.scaler = joblib.load(scaler_path) 
\ No newline at end of file
+            self.set_scaling(joblib.load(scaler_path)) 
\ No newline at end of file
@@ -1,23 +1,116 @@
 import yfinance as yf
 import pandas as pd
 import numpy as np
+import asyncio
+import math
+import time
+from numba import njit, prange
+from scipy.stats import norm, qmc
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
+from ..config import CACHE_EXPIRY, CACHE_DIR
 from ..models.database import DatabaseOperations
-from .technical_analysis import TechnicalAnalysis
+from .technical_analysis import TechnicalAnalysis, clear_series_cache
 from .ml_service import MLService
+from .file_cache import FileCache
+
+try:
+    import cupy as cp
+    USE_GPU = cp.is_available()
+except ImportError:
+    cp = None
+    USE_GPU = False
+
+def _sobol_paths(simulations: int) -> int:
+    """Path count actually simulated on the CPU: simulations rounded up to a power of two"""
+    return 1 << max(0, math.ceil(math.log2(simulations)))
+
+def _sobol_normals(dims: int, simulations: int) -> np.ndarray:
+    """Standard normal shocks shaped (_sobol_paths(simulations), dims) from a scrambled Sobol sequence.
+
+    A freshly scrambled engine is built per call so every run gets independent
+    shocks; the power-of-two draw keeps the sequence's balance properties, and
+    percentile bands then converge at close to O(1/N).
+    """
+    m = _sobol_paths(simulations).bit_length() - 1
+    u = qmc.Sobol(d=dims, scramble=True).random_base2(m)
+    eps = np.finfo(np.float32).eps
+    return norm.ppf(np.clip(u, eps, 1 - eps)).astype(np.float32)
+
+@njit(parallel=True, fastmath=True, cache=True)
+def _simulate_gbm(
+    last_price: float,
+    drift: float,
+    diffusion: float,
+    shocks: np.ndarray
+) -> np.ndarray:
+    """GBM paths shaped (days, simulations) from shocks shaped (simulations, days - 1).
+
+    Each path keeps its log-price in a register, so drift, cumulative sum and
+    exp are fused into one pass per parallel iteration.
+    """
+    simulations, steps = shocks.shape
+    out = np.empty((steps + 1, simulations), dtype=np.float32)
+    log_start = math.log(last_price)
+    for j in prange(simulations):
+        x = log_start
+        out[0, j] = last_price
+        for t in range(steps):
+            x += drift + diffusion * shocks[j, t]
+            out[t + 1, j] = math.exp(x)
+    return out
+
+def run_monte_carlo_gpu(
+    last_price: float,
+    mu: float,
+    sigma: float,
+    days: int,
+    simulations: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """GBM paths generated and reduced on the GPU.
+
+    Returns host arrays (simulation_matrix, mean_path, upper_95, lower_95),
+    with simulation_matrix shaped (days, simulations).
+    """
+    dt = 1/days
+    drift = np.float32((mu - 0.5 * sigma**2) * dt)
+    diffusion = np.float32(sigma * np.sqrt(dt))
+    rng = cp.random.default_rng()
+    shocks = rng.standard_normal((days - 1, simulations), dtype=cp.float32)
+    log_paths = cp.zeros((days, simulations), dtype=cp.float32)
+    cp.cumsum(drift + diffusion * shocks, axis=0, out=log_paths[1:])
+    simulation_matrix = np.float32(last_price) * cp.exp(log_paths)
+    lower, upper = cp.percentile(simulation_matrix, [2.5, 97.5], axis=1)
+    return (
+        simulation_matrix.get(),
+        simulation_matrix.mean(axis=1).get(),
+        upper.astype(cp.float32).get(),
+        lower.astype(cp.float32).get()
+    )
+
+# Shared by every StockService: the session, indicator helpers and trained
+# models are process-wide, so extra service instances stay cheap
+_DB = DatabaseOperations()
+_TA = TechnicalAnalysis()
+_ML = MLService()
 
 class StockService:
     def __init__(self):
         self.ticker = "TSLA"
         self.stock = yf.Ticker(self.ticker)
-        self.db = DatabaseOperations()
-        self.technical_analysis = TechnicalAnalysis()
-        self.ml_service = MLService()
+        self.file_cache = FileCache(CACHE_DIR)
+        self.db = _DB
+        self.technical_analysis = _TA
+        self.ml_service = _ML
+        self._metrics_cache: "OrderedDict[Tuple[str, str], Tuple[float, Dict]]" = OrderedDict()
+        self._metrics_locks: Dict[Tuple[str, str], asyncio.Lock] = {}
+        self._hist_futures: Dict[Tuple[str, str], Tuple[float, asyncio.Future]] = {}
 
     async def get_current_price(self) -> Dict:
         """Get current stock price and basic info"""
-        info = self.stock.info
+        # yfinance is blocking; keep the event loop free while it hits the network
+        info = await asyncio.to_thread(lambda: self.stock.info)
         return {
             "price": info.get("currentPrice"),
             "change": info.get("regularMarketChangePercent"),
@@ -31,27 +124,53 @@ class StockService:
         period: str = "1y",
         interval: str = "1d"
     ) -> pd.DataFrame:
-        """Get historical stock data"""
-        hist = self.stock.history(period=period, interval=interval)
+        """Get historical stock data.
+
+        One fetch per (period, interval) is shared by every caller for
+        CACHE_EXPIRY seconds, including callers that arrive while it is still
+        in flight. The returned frame is shared and must not be mutated.
+        """
+        key = (period, interval)
+        entry = self._hist_futures.get(key)
+        if entry is None or time.monotonic() - entry[0] >= CACHE_EXPIRY:
+            entry = (time.monotonic(), asyncio.ensure_future(self._fetch_historical_data(period, interval)))
+            self._hist_futures[key] = entry
+        
+        try:
+            # Shielded so one cancelled request doesn't cancel the shared fetch
+            return await asyncio.shield(entry[1])
+        except Exception:
+            if self._hist_futures.get(key) is entry:
+                del self._hist_futures[key]
+            raise
+
+    async def _fetch_historical_data(self, period: str, interval: str) -> pd.DataFrame:
+        # Daily bars change once a day; intraday bars are refreshed every 5 minutes
+        ttl = 86400 if interval.endswith(("d", "wk", "mo")) else 300
+        cache_key = (self.ticker, period, interval, datetime.now().date().isoformat())
+        hist = await asyncio.to_thread(self.file_cache.get, cache_key, ttl)
+        if hist is not None:
+            return hist
+        
+        hist = await asyncio.to_thread(self.stock.history, period=period, interval=interval)
         hist = hist.reset_index()
+        await asyncio.to_thread(self.file_cache.set, cache_key, hist)
+        clear_series_cache()
         
-        # Save to database
-        for _, row in hist.iterrows():
-            self.db.save_stock_data({
-                'date': row['Date'],
-                'open': row['Open'],
-                'high': row['High'],
-                'low': row['Low'],
-                'close': row['Close'],
-                'volume': row['Volume']
-            })
+        # Save to database in a single batch
+        rows = hist[['Date', 'Open', 'High', 'Low', 'Close', 'Volume']].rename(
+            columns=str.lower
+        ).to_dict(orient="records")
+        await asyncio.to_thread(self.db.save_stock_data_many, rows)
         
         return hist
 
     async def calculate_metrics(self, data: pd.DataFrame) -> Dict:
         """Calculate various financial metrics"""
-        returns = data['Close'].pct_change()
-        
+        # Indicator math and the database writes both run in a worker thread
+        return await asyncio.to_thread(self._calculate_metrics_sync, data)
+
+    def _calculate_metrics_sync(self, data: pd.DataFrame) -> Dict:
         # Calculate technical indicators
         rsi = self.technical_analysis.calculate_rsi(data['Close'])
         macd, signal, hist = self.technical_analysis.calculate_macd(data['Close'])
@@ -61,92 +180,154 @@ class StockService:
         stats_metrics = self.technical_analysis.calculate_statistical_metrics(data['Close'])
         
         # Calculate volatility metrics
-        vol_metrics = self.technical_analysis.calculate_volatility_metrics(data['Close'])
+        vol_metrics = self.technical_analysis.calculate_volatility_metrics(
+            data[['Open', 'High', 'Low', 'Close']]
+        )
         
         # Calculate market regime
         regime = self.technical_analysis.calculate_market_regime(data['Close'])
         
-        # Save all metrics to database
-        for date, row in data.iterrows():
-            self.db.save_technical_indicators({
-                'date': date,
-                'rsi': rsi[date],
-                'macd': macd[date],
-                'macd_signal': signal[date],
-                'macd_histogram': hist[date],
-                'bb_upper': bb_upper[date],
-                'bb_middle': bb_middle[date],
-                'bb_lower': bb_lower[date]
-            })
-            
-            self.db.save_statistical_metrics({
-                'date': date,
-                **stats_metrics
-            })
-            
-            self.db.save_volatility_metrics({
-                'date': date,
-                **vol_metrics
-            })
-            
-            self.db.save_market_regime({
-                'date': date,
-                'regime': regime[date],
-                'z_score': (returns[date] - returns.mean()) / returns.std()
-            })
+        # Align every series to the frame's rows once as plain lists; the same
+        # lists feed the database rows and the column-oriented payload
+        def column(series: pd.Series) -> List[float]:
+            return series.reindex(data.index).to_numpy(dtype=np.float64).tolist()
+        
+        dates = data['Date']
+        date_values = dates.tolist()
+        indicator_columns = {
+            'rsi': column(rsi),
+            'macd': column(macd),
+            'macd_signal': column(signal),
+            'macd_hist': column(hist),
+            'bollinger_upper': column(bb_upper),
+            'bollinger_middle': column(bb_middle),
+            'bollinger_lower': column(bb_lower)
+        }
+        vol_columns = {name: column(values) for name, values in vol_metrics.items()}
+        regime_labels = regime.reindex(data.index).astype(object)
+        regime_values = regime_labels.where(regime_labels.notna(), None).tolist()
+        
+        # Save all metrics to database, one batch per table; keys follow the ORM models
+        indicator_names = list(indicator_columns)
+        self.db.save_technical_indicators_many([
+            {'date': date, **dict(zip(indicator_names, values))}
+            for date, *values in zip(date_values, *indicator_columns.values())
+        ])
+        
+        vol_names = list(vol_columns)
+        self.db.save_volatility_metrics_many([
+            {'date': date, **dict(zip(vol_names, values))}
+            for date, *values in zip(date_values, *vol_columns.values())
+        ])
         
+        self.db.save_market_regime_many([
+            {'date': date, 'regime': label}
+            for date, label in zip(date_values, regime_values)
+            if label is not None
+        ])
+        
+        # Column-oriented payload: one shared date axis plus a plain list per
+        # series, instead of a {Timestamp: float} dict per series
         return {
+            'dates': dates.dt.strftime('%Y-%m-%d').tolist(),
             'technical_indicators': {
-                'rsi': rsi.to_dict(),
-                'macd': macd.to_dict(),
-                'macd_signal': signal.to_dict(),
-                'macd_histogram': hist.to_dict(),
+                'rsi': indicator_columns['rsi'],
+                'macd': indicator_columns['macd'],
+                'macd_signal': indicator_columns['macd_signal'],
+                'macd_histogram': indicator_columns['macd_hist'],
                 'bollinger_bands': {
-                    'upper': bb_upper.to_dict(),
-                    'middle': bb_middle.to_dict(),
-                    'lower': bb_lower.to_dict()
+                    'upper': indicator_columns['bollinger_upper'],
+                    'middle': indicator_columns['bollinger_middle'],
+                    'lower': indicator_columns['bollinger_lower']
                 }
             },
             'statistical_metrics': stats_metrics,
-            'volatility_metrics': vol_metrics,
-            'market_regime': regime.to_dict()
+            'volatility_metrics': vol_columns,
+            'market_regime': regime_values
         }
 
+    async def metrics_for_range(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        interval: str = "1d",
+        maxsize: int = 64
+    ) -> Dict:
+        """Full metrics for a date range, computed once and shared by concurrent callers"""
+        key = (f"{(end_date - start_date).days}d", interval)
+        
+        cached = self._metrics_cache.get(key)
+        if cached is not None and time.monotonic() - cached[0] < CACHE_EXPIRY:
+            return cached[1]
+        
+        # Locks are created lazily so they bind to the running event loop
+        lock = self._metrics_locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            cached = self._metrics_cache.get(key)
+            if cached is not None and time.monotonic() - cached[0] < CACHE_EXPIRY:
+                return cached[1]
+            
+            data = await self.get_historical_data(period=key[0], interval=interval)
+            metrics = await self.calculate_metrics(data)
+            
+            self._metrics_cache[key] = (time.monotonic(), metrics)
+            self._metrics_cache.move_to_end(key)
+            while len(self._metrics_cache) > maxsize:
+                evicted, _ = self._metrics_cache.popitem(last=False)
+                self._metrics_locks.pop(evicted, None)
+            return metrics
+
     async def run_monte_carlo(
         self,
         days: int = 252,
-        simulations: int = 1000
+        simulations: int = 256,
+        hist_data: Optional[pd.DataFrame] = None
     ) -> Dict:
-        """Run Monte Carlo simulation"""
-        hist_data = await self.get_historical_data(period="1y")
+        """Run Monte Carlo simulation.
+
+        The CPU (Sobol) path rounds simulations up to a power of two;
+        "simulation_count" in the result is the number of paths actually run.
+        """
+        if hist_data is None:
+            hist_data = await self.get_historical_data(period="1y")
         returns = hist_data['Close'].pct_change().dropna()
         
-        mu = returns.mean()
-        sigma = returns.std()
-        last_price = hist_data['Close'].iloc[-1]
+        # float32 is ample precision for simulated equity prices and halves
+        # the memory traffic of every pass over the simulation matrix
+        mu = np.float32(returns.mean())
+        sigma = np.float32(returns.std())
+        last_price = np.float32(hist_data['Close'].iloc[-1])
         
         # Generate simulations
-        dt = 1/days
-        simulation_matrix = np.zeros((days, simulations))
-        simulation_matrix[0] = last_price
-        
-        for t in range(1, days):
-            random_shocks = np.random.normal(0, 1, simulations)
-            simulation_matrix[t] = simulation_matrix[t-1] * np.exp(
-                (mu - 0.5 * sigma**2) * dt + sigma * np.sqrt(dt) * random_shocks
+        if USE_GPU:
+            simulation_matrix, mean_path, upper, lower = run_monte_carlo_gpu(
+                float(last_price), float(mu), float(sigma), days, simulations
+            )
+        else:
+            dt = np.float32(1/days)
+            drift = (mu - np.float32(0.5) * sigma**2) * dt
+            diffusion = sigma * np.sqrt(dt)
+            shocks = _sobol_normals(days - 1, simulations)
+            simulation_matrix = _simulate_gbm(
+                float(last_price), float(drift), float(diffusion), shocks
             )
+            
+            mean_path = simulation_matrix.mean(axis=1)
+            lower, upper = np.percentile(simulation_matrix, [2.5, 97.5], axis=1).astype(np.float32)
         
+        # Arrays are returned as-is; the API layer serializes them with orjson
         result = {
-            "simulations": simulation_matrix.tolist(),
-            "mean_path": simulation_matrix.mean(axis=1).tolist(),
+            "simulation_count": simulation_matrix.shape[1],
+            "simulations": simulation_matrix,
+            "mean_path": mean_path,
             "confidence_interval_95": {
-                "upper": np.percentile(simulation_matrix, 97.5, axis=1).tolist(),
-                "lower": np.percentile(simulation_matrix, 2.5, axis=1).tolist()
+                "upper": upper,
+                "lower": lower
             }
         }
         
         # Save simulation results to database
-        self.db.save_monte_carlo_simulation({
+        await asyncio.to_thread(self.db.save_monte_carlo_simulation, {
             'date': datetime.now(),
             'simulation_date': datetime.now() + timedelta(days=days),
             'mean_path': result['mean_path'],
@@ -183,10 +364,11 @@ class StockService:
         except Exception as e:
             raise Exception(f"Error training ML models: {str(e)}")
 
-    async def get_ml_predictions(self) -> Dict:
+    async def get_ml_predictions(self, data: Optional[pd.DataFrame] = None) -> Dict:
         """Get next day price predictions from ML models"""
         try:
-            data = await self.get_historical_data(period="1y")
+            if data is None:
+                data = await self.get_historical_data(period="1y")
             predictions = self.ml_service.predict_next_day(data)
             return predictions
         except Exception as e:
@@ -195,14 +377,18 @@ class StockService:
     async def get_combined_analysis(self) -> Dict:
         """Get combined analysis including ML predictions"""
         try:
-            current_price = await self.get_current_price()
-            historical_data = await self.get_historical_data(period="1y")
+            current_price, historical_data = await asyncio.gather(
+                self.get_current_price(),
+                self.get_historical_data(period="1y")
+            )
             metrics = await self.calculate_metrics(historical_data)
-            ml_predictions = await self.get_ml_predictions()
-            monte_carlo = await self.run_monte_carlo()
+            # Every stage works off the single history fetch above
+            ml_predictions = await self.get_ml_predictions(historical_data)
+            monte_carlo = await self.run_monte_carlo(hist_data=historical_data)
 
             return {
                 "current_price": current_price,
+                "dates": metrics['dates'],
                 "technical_analysis": metrics['technical_indicators'],
                 "statistical_metrics": metrics['statistical_metrics'],
                 "volatility_metrics": metrics['volatility_metrics'],
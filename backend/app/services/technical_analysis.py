@@ -1,38 +1,246 @@
 import numpy as np
 import pandas as pd
-from typing import Dict, List, Tuple
+import math
+import threading
+from collections import OrderedDict
+from functools import wraps
+from typing import Callable, Dict, List, Tuple, Union
 from scipy import stats
 from sklearn.preprocessing import StandardScaler
 from sklearn.decomposition import PCA
+from numba import njit
+
+# Category order matches the condition order in calculate_market_regime
+MARKET_REGIMES = ['high_volatility_bull', 'high_volatility_bear', 'bull', 'bear', 'low_volatility']
+
+@njit(cache=True)
+def _wilder_smooth(x: np.ndarray, period: int) -> np.ndarray:
+    """Wilder's smoothing: SMA seed over x[1:period+1], then alpha = 1/period.
+
+    x[0] is skipped because it is the padding of a prepended diff.
+    """
+    n = x.shape[0]
+    out = np.full(n, np.nan)
+    if n <= period:
+        return out
+    avg = 0.0
+    for i in range(1, period + 1):
+        avg += x[i]
+    avg /= period
+    out[period] = avg
+    alpha = 1.0 / period
+    for i in range(period + 1, n):
+        avg += alpha * (x[i] - avg)
+        out[i] = avg
+    return out
+
+@njit(cache=True)
+def _rolling_mean(x: np.ndarray, period: int) -> np.ndarray:
+    """Rolling mean from a running sum; the first period - 1 values are NaN.
+
+    NaNs are counted rather than summed, so a window is NaN only while it
+    holds one, as with pandas rolling().
+    """
+    n = x.shape[0]
+    out = np.full(n, np.nan)
+    s = 0.0
+    nans = 0
+    for i in range(n):
+        v = x[i]
+        if np.isnan(v):
+            nans += 1
+        else:
+            s += v
+        if i >= period:
+            old = x[i - period]
+            if np.isnan(old):
+                nans -= 1
+            else:
+                s -= old
+        if i >= period - 1 and nans == 0:
+            out[i] = s / period
+    return out
+
+@njit(cache=True)
+def _bollinger_bands(x: np.ndarray, period: int, k: float):
+    """Rolling mean +/- k sample std from running sum and sum of squares.
+
+    Returns (upper, middle, lower); the first period - 1 values are NaN, as
+    is any window that holds a NaN.
+    """
+    n = x.shape[0]
+    upper = np.full(n, np.nan)
+    middle = np.full(n, np.nan)
+    lower = np.full(n, np.nan)
+    s = 0.0
+    s2 = 0.0
+    nans = 0
+    for i in range(n):
+        v = x[i]
+        if np.isnan(v):
+            nans += 1
+        else:
+            s += v
+            s2 += v * v
+        if i >= period:
+            old = x[i - period]
+            if np.isnan(old):
+                nans -= 1
+            else:
+                s -= old
+                s2 -= old * old
+        if i >= period - 1 and nans == 0:
+            mean = s / period
+            var = (s2 - s * mean) / (period - 1)
+            std = math.sqrt(max(var, 0.0))
+            middle[i] = mean
+            upper[i] = mean + k * std
+            lower[i] = mean - k * std
+    return upper, middle, lower
+
+@njit(cache=True)
+def _macd(x: np.ndarray, fast: int, slow: int, sig_period: int):
+    """Fast/slow EMA difference, its signal EMA and the histogram in one pass"""
+    n = x.shape[0]
+    macd = np.full(n, np.nan)
+    signal = np.full(n, np.nan)
+    hist = np.full(n, np.nan)
+    a_fast = 2.0 / (fast + 1)
+    a_slow = 2.0 / (slow + 1)
+    a_sig = 2.0 / (sig_period + 1)
+    started = False
+    e_fast = 0.0
+    e_slow = 0.0
+    sig = 0.0
+    for i in range(n):
+        v = x[i]
+        if not started:
+            if np.isnan(v):
+                continue
+            # Seed with the first valid value, as ewm(adjust=False) does
+            e_fast = v
+            e_slow = v
+            sig = 0.0
+            started = True
+        elif not np.isnan(v):
+            e_fast += a_fast * (v - e_fast)
+            e_slow += a_slow * (v - e_slow)
+            sig += a_sig * ((e_fast - e_slow) - sig)
+        m = e_fast - e_slow
+        macd[i] = m
+        signal[i] = sig
+        hist[i] = m - sig
+    return macd, signal, hist
+
+@njit(cache=True)
+def _max_drawdown(x: np.ndarray) -> float:
+    """Most negative x / running_max(x) - 1, tracked in one pass"""
+    if x.shape[0] == 0:
+        return np.nan
+    peak = x[0]
+    max_dd = 0.0
+    for v in x:
+        if v > peak:
+            peak = v
+        dd = v / peak - 1.0
+        if dd < max_dd:
+            max_dd = dd
+    return max_dd
+
+@njit(cache=True)
+def _downside_std(x: np.ndarray) -> float:
+    """Sample std of the negative values of x (Welford, one pass)"""
+    count = 0
+    mean = 0.0
+    m2 = 0.0
+    for v in x:
+        if v < 0.0:
+            count += 1
+            delta = v - mean
+            mean += delta / count
+            m2 += delta * (v - mean)
+    if count < 2:
+        return np.nan
+    return math.sqrt(m2 / (count - 1))
+
+_SERIES_CACHES: List[Callable] = []
+
+def _fingerprint(data: Union[pd.Series, pd.DataFrame]) -> tuple:
+    """Identity for a series or frame: length, labels and a hash of index and values"""
+    labels = tuple(data.columns) if isinstance(data, pd.DataFrame) else data.name
+    if len(data) == 0:
+        return (0, labels)
+    # O(n) but vectorised; end points alone miss edits in the middle
+    digest = int(pd.util.hash_pandas_object(data, index=True).sum())
+    return (len(data), labels, digest)
+
+def _series_cache(maxsize: int = 8):
+    """Memoize a pure function of a series/frame on its fingerprint and arguments"""
+    def decorator(func):
+        cache = OrderedDict()
+        lock = threading.Lock()
+        
+        @wraps(func)
+        def wrapper(data, *args, **kwargs):
+            if len(data) == 0:
+                return func(data, *args, **kwargs)
+            key = (_fingerprint(data), args, tuple(sorted(kwargs.items())))
+            with lock:
+                if key in cache:
+                    cache.move_to_end(key)
+                    return cache[key]
+            result = func(data, *args, **kwargs)
+            with lock:
+                cache[key] = result
+                if len(cache) > maxsize:
+                    cache.popitem(last=False)
+            return result
+        
+        def cache_clear():
+            with lock:
+                cache.clear()
+        
+        wrapper.cache_clear = cache_clear
+        _SERIES_CACHES.append(wrapper)
+        return wrapper
+    return decorator
+
+def clear_series_cache():
+    """Drop every memoized TechnicalAnalysis result, e.g. after fresh data is fetched"""
+    for cached in _SERIES_CACHES:
+        cached.cache_clear()
 
 class TechnicalAnalysis:
     @staticmethod
     def calculate_rsi(data: pd.Series, period: int = 14) -> pd.Series:
-        """Calculate Relative Strength Index"""
-        delta = data.diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-        rs = gain / loss
-        return 100 - (100 / (1 + rs))
+        """Calculate Relative Strength Index (Wilder smoothing)"""
+        arr = data.to_numpy(dtype=np.float64)
+        delta = np.diff(arr, prepend=arr[:1])
+        gain = _wilder_smooth(np.maximum(delta, 0.0), period)
+        loss = _wilder_smooth(np.maximum(-delta, 0.0), period)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsi = 100 - (100 / (1 + gain / loss))
+        return pd.Series(rsi, index=data.index)
 
     @staticmethod
     def calculate_macd(data: pd.Series, fast: int = 12, slow: int = 26, signal: int = 9) -> Tuple[pd.Series, pd.Series, pd.Series]:
         """Calculate MACD (Moving Average Convergence Divergence)"""
-        exp1 = data.ewm(span=fast, adjust=False).mean()
-        exp2 = data.ewm(span=slow, adjust=False).mean()
-        macd = exp1 - exp2
-        signal_line = macd.ewm(span=signal, adjust=False).mean()
-        histogram = macd - signal_line
-        return macd, signal_line, histogram
+        macd, signal_line, histogram = _macd(data.to_numpy(dtype=np.float64), fast, slow, signal)
+        return (
+            pd.Series(macd, index=data.index),
+            pd.Series(signal_line, index=data.index),
+            pd.Series(histogram, index=data.index)
+        )
 
     @staticmethod
     def calculate_bollinger_bands(data: pd.Series, period: int = 20, std_dev: float = 2.0) -> Tuple[pd.Series, pd.Series, pd.Series]:
         """Calculate Bollinger Bands"""
-        middle_band = data.rolling(window=period).mean()
-        std = data.rolling(window=period).std()
-        upper_band = middle_band + (std * std_dev)
-        lower_band = middle_band - (std * std_dev)
-        return upper_band, middle_band, lower_band
+        upper, middle, lower = _bollinger_bands(data.to_numpy(dtype=np.float64), period, std_dev)
+        return (
+            pd.Series(upper, index=data.index),
+            pd.Series(middle, index=data.index),
+            pd.Series(lower, index=data.index)
+        )
 
     @staticmethod
     def calculate_fibonacci_retracement(high: float, low: float) -> Dict[str, float]:
@@ -49,51 +257,65 @@ class TechnicalAnalysis:
         }
 
     @staticmethod
+    @_series_cache()
     def calculate_statistical_metrics(data: pd.Series) -> Dict:
         """Calculate advanced statistical metrics"""
         returns = data.pct_change().dropna()
+        returns_np = returns.to_numpy(dtype=np.float64)
+        max_drawdown = _max_drawdown(data.to_numpy(dtype=np.float64))
+        var_95 = np.percentile(returns_np, 5)
+        
+        jarque_bera = stats.jarque_bera(returns)
         
         metrics = {
             'mean': returns.mean(),
             'std': returns.std(),
             'skewness': stats.skew(returns),
             'kurtosis': stats.kurtosis(returns),
-            'jarque_bera': stats.jarque_bera(returns),
+            # Plain floats: the scipy result object is a tuple subclass orjson rejects
+            'jarque_bera': {
+                'statistic': float(jarque_bera.statistic),
+                'pvalue': float(jarque_bera.pvalue)
+            },
             'sharpe_ratio': (returns.mean() * 252) / (returns.std() * np.sqrt(252)),
-            'sortino_ratio': (returns.mean() * 252) / (returns[returns < 0].std() * np.sqrt(252)),
-            'var_95': np.percentile(returns, 5),
-            'cvar_95': returns[returns <= np.percentile(returns, 5)].mean(),
-            'max_drawdown': (data / data.cummax() - 1).min(),
-            'calmar_ratio': (returns.mean() * 252) / abs((data / data.cummax() - 1).min())
+            'sortino_ratio': (returns.mean() * 252) / (_downside_std(returns_np) * np.sqrt(252)),
+            'var_95': var_95,
+            'cvar_95': returns_np[returns_np <= var_95].mean(),
+            'max_drawdown': max_drawdown,
+            'calmar_ratio': (returns.mean() * 252) / abs(max_drawdown)
         }
         return metrics
 
     @staticmethod
-    def calculate_volatility_metrics(data: pd.Series, window: int = 20) -> Dict:
-        """Calculate various volatility metrics"""
-        returns = data.pct_change().dropna()
+    @_series_cache()
+    def calculate_volatility_metrics(data: pd.DataFrame, window: int = 20) -> Dict:
+        """Calculate various volatility metrics from an OHLC frame"""
+        high = data['High'].to_numpy(dtype=np.float64)
+        low = data['Low'].to_numpy(dtype=np.float64)
+        open_ = data['Open'].to_numpy(dtype=np.float64)
+        close = data['Close'].to_numpy(dtype=np.float64)
+        returns = data['Close'].pct_change().dropna()
         
         # Historical Volatility
         hist_vol = returns.rolling(window=window).std() * np.sqrt(252)
         
         # Parkinson Volatility (High-Low Range)
-        high_low_range = np.log(data / data.shift(1))
-        park_vol = np.sqrt(1 / (4 * window * np.log(2)) * 
-                          (high_low_range ** 2).rolling(window=window).sum()) * np.sqrt(252)
+        log_hl = np.log(high / low)
+        park_vol = np.sqrt(_rolling_mean(log_hl ** 2, window) / (4 * np.log(2))) * np.sqrt(252)
         
         # Garman-Klass Volatility
-        log_hl = np.log(data / data.shift(1))
-        log_co = np.log(data / data.shift(1))
-        gk_vol = np.sqrt(0.5 * log_hl**2 - (2*np.log(2)-1) * log_co**2)
-        gk_vol = gk_vol.rolling(window=window).mean() * np.sqrt(252)
+        log_co = np.log(close / open_)
+        gk_daily = 0.5 * log_hl ** 2 - (2 * np.log(2) - 1) * log_co ** 2
+        gk_vol = np.sqrt(_rolling_mean(gk_daily, window)) * np.sqrt(252)
         
         return {
             'historical_volatility': hist_vol,
-            'parkinson_volatility': park_vol,
-            'garman_klass_volatility': gk_vol
+            'parkinson_volatility': pd.Series(park_vol, index=data.index),
+            'garman_klass_volatility': pd.Series(gk_vol, index=data.index)
         }
 
     @staticmethod
+    @_series_cache()
     def calculate_market_regime(data: pd.Series, window: int = 20) -> pd.Series:
         """Detect market regime using rolling statistics"""
         returns = data.pct_change().dropna()
@@ -103,14 +325,21 @@ class TechnicalAnalysis:
         rolling_std = returns.rolling(window=window).std()
         
         # Define regimes based on z-score
-        z_score = (returns - rolling_mean) / rolling_std
-        
-        regime = pd.Series(index=returns.index)
-        regime[z_score > 2] = 'high_volatility_bull'
-        regime[z_score < -2] = 'high_volatility_bear'
-        regime[(z_score >= -0.5) & (z_score <= 0.5)] = 'low_volatility'
-        regime[(z_score > 0.5) & (z_score <= 2)] = 'bull'
-        regime[(z_score < -0.5) & (z_score >= -2)] = 'bear'
+        z_score = ((returns - rolling_mean) / rolling_std).to_numpy()
+        
+        # Single pass over the conditions; int8 codes, -1 marks the warm-up rows
+        conditions = [
+            z_score > 2,
+            z_score < -2,
+            (z_score > 0.5) & (z_score <= 2),
+            (z_score < -0.5) & (z_score >= -2),
+            np.abs(z_score) <= 0.5,
+        ]
+        codes = np.select(conditions, np.arange(len(MARKET_REGIMES), dtype=np.int8), default=-1)
+        regime = pd.Series(
+            pd.Categorical.from_codes(codes.astype(np.int8), MARKET_REGIMES),
+            index=returns.index
+        )
         
         return regime
 
@@ -3,16 +3,20 @@ Configuration management for the quantitative finance framework.
 """
 
 import os
+import re
 import yaml
 from pathlib import Path
 from typing import Any, Dict, Optional
 from dotenv import load_dotenv
 
+_ENV_RE = re.compile(r"^\$\{([^}]+)\}$")
+
 class Config:
     """Configuration manager for the framework."""
     
     _instance = None
     _config: Dict[str, Any] = {}
+    _flat: Optional[Dict[str, Any]] = None
     
     def __new__(cls):
         if cls._instance is None:
@@ -35,28 +39,40 @@ class Config:
         
         # Replace environment variables
         self._replace_env_vars(self._config)
+        self._flat = self._flatten(self._config)
     
     def _replace_env_vars(self, config: Dict[str, Any]):
         """Replace ${VAR} with environment variable values."""
-        for key, value in config.items():
-            if isinstance(value, dict):
-                self._replace_env_vars(value)
-            elif isinstance(value, str) and value.startswith("${") and value.endswith("}"):
-                env_var = value[2:-1]
-                config[key] = os.getenv(env_var)
+        stack = [config]
+        while stack:
+            section = stack.pop()
+            for key, value in section.items():
+                if isinstance(value, dict):
+                    stack.append(value)
+                elif isinstance(value, str):
+                    match = _ENV_RE.match(value)
+                    if match:
+                        section[key] = os.environ.get(match.group(1))
+    
+    @staticmethod
+    def _flatten(config: Dict[str, Any]) -> Dict[str, Any]:
+        """Map every dotted key path, sections included, to its value."""
+        flat = {}
+        stack = [("", config)]
+        while stack:
+            prefix, section = stack.pop()
+            for key, value in section.items():
+                path = f"{prefix}{key}"
+                flat[path] = value
+                if isinstance(value, dict):
+                    stack.append((f"{path}.", value))
+        return flat
     
     def get(self, key: str, default: Any = None) -> Any:
         """Get configuration value by key."""
-        keys = key.split(".")
-        value = self._config
-        
-        for k in keys:
-            if isinstance(value, dict):
-                value = value.get(k, default)
-            else:
-                return default
-        
-        return value
+        if self._flat is None:
+            self._flat = self._flatten(self._config)
+        return self._flat.get(key, default)
     
     def set(self, key: str, value: Any):
         """Set configuration value by key."""
@@ -69,6 +85,8 @@ class Config:
             config = config[k]
         
         config[keys[-1]] = value
+        # Rebuilt on the next get()
+        self._flat = None
     
     def save(self, path: Optional[str] = None):
         """Save current configuration to YAML file."""
@@ -4,16 +4,141 @@ Data loading and preprocessing module for the quantitative finance framework.
 
 import pandas as pd
 import numpy as np
+import math
 from typing import List, Dict, Any, Optional, Union
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 import yfinance as yf
 from datetime import datetime, timedelta
+from numba import njit, prange
 
 from ..config import Config
 from ..utils.logging import get_logger
 
 logger = get_logger(__name__)
 
+@njit(cache=True)
+def _wilder_smooth(x: np.ndarray, period: int) -> np.ndarray:
+    """
+    Wilder's smoothing: SMA seed over x[1:period+1], then alpha = 1/period.
+    
+    x[0] is skipped because it is the padding of a prepended diff.
+    """
+    n = x.shape[0]
+    out = np.full(n, np.nan)
+    if n <= period:
+        return out
+    avg = 0.0
+    for i in range(1, period + 1):
+        avg += x[i]
+    avg /= period
+    out[period] = avg
+    alpha = 1.0 / period
+    for i in range(period + 1, n):
+        avg += alpha * (x[i] - avg)
+        out[i] = avg
+    return out
+
+@njit(cache=True)
+def _rolling_mean_std(x: np.ndarray, period: int):
+    """
+    Rolling mean and sample std from a running sum and sum of squares.
+    
+    Returns (mean, std); the first period - 1 values are NaN. NaNs are counted
+    rather than summed, so a window is NaN only while it holds one, as with
+    pandas rolling(). Kept in step with the backend technical_analysis kernels.
+    """
+    n = x.shape[0]
+    mean = np.full(n, np.nan)
+    std = np.full(n, np.nan)
+    s = 0.0
+    s2 = 0.0
+    nans = 0
+    for i in range(n):
+        v = x[i]
+        if np.isnan(v):
+            nans += 1
+        else:
+            s += v
+            s2 += v * v
+        if i >= period:
+            old = x[i - period]
+            if np.isnan(old):
+                nans -= 1
+            else:
+                s -= old
+                s2 -= old * old
+        if i >= period - 1 and nans == 0:
+            m = s / period
+            var = (s2 - s * m) / (period - 1)
+            mean[i] = m
+            std[i] = math.sqrt(max(var, 0.0))
+    return mean, std
+
+@njit(cache=True)
+def _bollinger_bands(x: np.ndarray, period: int, k: float):
+    """
+    Rolling mean +/- k sample std in one pass over x.
+    
+    Returns (upper, middle, lower); the first period - 1 values are NaN, as is
+    any window that holds a NaN.
+    """
+    middle, std = _rolling_mean_std(x, period)
+    return middle + k * std, middle, middle - k * std
+
+@njit(cache=True)
+def _macd(x: np.ndarray, fast: int, slow: int, sig_period: int):
+    """
+    MACD line, signal line and histogram from three EMA states in one pass.
+    
+    Matches pandas ewm(span=..., adjust=False) on gap-free input; NaN inputs hold the previous state.
+    """
+    n = x.shape[0]
+    macd = np.full(n, np.nan)
+    signal = np.full(n, np.nan)
+    hist = np.full(n, np.nan)
+    a_fast = 2.0 / (fast + 1)
+    a_slow = 2.0 / (slow + 1)
+    a_sig = 2.0 / (sig_period + 1)
+    started = False
+    e_fast = 0.0
+    e_slow = 0.0
+    sig = 0.0
+    for i in range(n):
+        v = x[i]
+        if not started:
+            if np.isnan(v):
+                continue
+            # Seed with the first valid value, as ewm(adjust=False) does
+            e_fast = v
+            e_slow = v
+            sig = 0.0
+            started = True
+        elif not np.isnan(v):
+            e_fast += a_fast * (v - e_fast)
+            e_slow += a_slow * (v - e_slow)
+            sig += a_sig * ((e_fast - e_slow) - sig)
+        m = e_fast - e_slow
+        macd[i] = m
+        signal[i] = sig
+        hist[i] = m - sig
+    return macd, signal, hist
+
+@njit(cache=True, parallel=True)
+def _pct_change_multi(close: np.ndarray, periods: np.ndarray) -> np.ndarray:
+    """
+    close[i] / close[i - p] - 1 for every p in periods, as an (N, len(periods)) array.
+    """
+    n = close.shape[0]
+    m = periods.shape[0]
+    out = np.full((n, m), np.nan)
+    for i in prange(n):
+        for k in range(m):
+            p = periods[k]
+            if i >= p:
+                out[i, k] = close[i] / close[i - p] - 1.0
+    return out
+
 class DataLoader:
     """Base class for loading and preprocessing financial data."""
     
@@ -34,7 +159,8 @@ class DataLoader:
         start_date: Optional[Union[str, datetime]] = None,
         end_date: Optional[Union[str, datetime]] = None,
         interval: str = "1d",
-        use_cache: bool = True
+        use_cache: bool = True,
+        columns: Optional[List[str]] = None
     ) -> pd.DataFrame:
         """
         Load stock data from Yahoo Finance.
@@ -45,6 +171,8 @@ class DataLoader:
             end_date: End date for data
             interval: Data interval (1d, 1h, etc.)
             use_cache: Whether to use cached data
+            columns: Optional subset of columns to return (e.g. ["Close"]);
+                cached files are read column-wise so unused columns are never loaded
             
         Returns:
             pd.DataFrame: Stock data with MultiIndex (ticker, date)
@@ -63,27 +191,61 @@ class DataLoader:
         if isinstance(end_date, str):
             end_date = pd.to_datetime(end_date)
         
+        cache_files = {
+            ticker: self.cache_dir / f"{ticker}_{interval}_{start_date.date()}_{end_date.date()}.parquet"
+            for ticker in tickers
+        }
+        
         data = {}
+        missing = []
         for ticker in tickers:
-            cache_file = self.cache_dir / f"{ticker}_{interval}_{start_date.date()}_{end_date.date()}.parquet"
-            
-            if use_cache and cache_file.exists():
+            if use_cache and cache_files[ticker].exists():
                 logger.info(f"Loading cached data for {ticker}")
-                ticker_data = pd.read_parquet(cache_file)
+                data[ticker] = pd.read_parquet(cache_files[ticker], columns=columns)
             else:
-                logger.info(f"Downloading data for {ticker}")
-                ticker_data = yf.download(
-                    ticker,
-                    start=start_date,
-                    end=end_date,
-                    interval=interval,
-                    progress=False
-                )
-                
-                if use_cache:
-                    ticker_data.to_parquet(cache_file)
+                missing.append(ticker)
+        
+        if missing:
+            # One threaded request for every uncached ticker instead of one per ticker
+            logger.info(f"Downloading data for {', '.join(missing)}")
+            downloaded = yf.download(
+                missing,
+                start=start_date,
+                end=end_date,
+                interval=interval,
+                group_by="ticker",
+                threads=True,
+                progress=False
+            )
+            
+            fresh = {}
+            for ticker in missing:
+                if isinstance(downloaded.columns, pd.MultiIndex):
+                    # Rows are the union of all tickers' dates; drop the ones this ticker lacks
+                    ticker_data = downloaded.xs(ticker, level=0, axis=1).dropna(how="all")
+                else:
+                    ticker_data = downloaded
+                fresh[ticker] = ticker_data
+            
+            if use_cache:
+                with ThreadPoolExecutor() as executor:
+                    list(executor.map(
+                        lambda ticker: fresh[ticker].to_parquet(
+                            cache_files[ticker],
+                            engine="pyarrow",
+                            compression="zstd",
+                            use_dictionary=True
+                        ),
+                        missing
+                    ))
             
-            data[ticker] = ticker_data
+            # The cache keeps every column; only the requested ones are returned
+            if columns is not None:
+                fresh = {ticker: frame[columns] for ticker, frame in fresh.items()}
+            data.update(fresh)
+        
+        # Keep the caller's ticker order in the combined frame
+        data = {ticker: data[ticker] for ticker in tickers}
         
         # Combine all tickers into one DataFrame
         combined_data = pd.concat(
@@ -115,19 +277,26 @@ class DataLoader:
         Returns:
             pd.DataFrame: Preprocessed data
         """
-        # Make a copy to avoid modifying original data
-        df = data.copy()
-        
-        # Fill missing values
-        df = df.fillna(method=fill_method)
+        # Select features first so only the needed columns are filled and scaled
+        df = data[features] if features is not None else data
         
-        # Select features
-        if features is not None:
-            df = df[features]
+        # Fill missing values (returns a new frame, so the input is never modified)
+        if fill_method in ("ffill", "pad"):
+            df = df.ffill()
+        elif fill_method in ("bfill", "backfill"):
+            df = df.bfill()
+        else:
+            raise ValueError(f"Unsupported fill_method: {fill_method}")
         
-        # Normalize data
+        # Normalize data in place on a single array
         if normalize:
-            df = (df - df.mean()) / df.std()
+            arr = df.to_numpy(dtype=np.float64, copy=True)
+            mean = np.nanmean(arr, axis=0)
+            std = np.nanstd(arr, axis=0, ddof=1)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                np.subtract(arr, mean, out=arr)
+                np.divide(arr, std, out=arr)
+            df = pd.DataFrame(arr, index=df.index, columns=df.columns)
         
         return df
     
@@ -157,34 +326,37 @@ class DataLoader:
             
             if name == "RSI":
                 period = params.get("period", 14)
-                delta = df["Close"].diff()
-                gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-                loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-                rs = gain / loss
-                df[f"RSI_{period}"] = 100 - (100 / (1 + rs))
+                close = df["Close"].to_numpy(dtype=np.float64)
+                delta = np.diff(close, prepend=close[:1])
+                gain = _wilder_smooth(np.maximum(delta, 0.0), period)
+                loss = _wilder_smooth(np.maximum(-delta, 0.0), period)
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    df[f"RSI_{period}"] = 100 - (100 / (1 + gain / loss))
             
             elif name == "MACD":
                 fast_period = params.get("fast_period", 12)
                 slow_period = params.get("slow_period", 26)
                 signal_period = params.get("signal_period", 9)
                 
-                exp1 = df["Close"].ewm(span=fast_period, adjust=False).mean()
-                exp2 = df["Close"].ewm(span=slow_period, adjust=False).mean()
-                macd = exp1 - exp2
-                signal = macd.ewm(span=signal_period, adjust=False).mean()
+                macd, signal, hist = _macd(
+                    df["Close"].to_numpy(dtype=np.float64),
+                    fast_period, slow_period, signal_period
+                )
                 
                 df[f"MACD_{fast_period}_{slow_period}"] = macd
                 df[f"MACD_Signal_{fast_period}_{slow_period}"] = signal
-                df[f"MACD_Hist_{fast_period}_{slow_period}"] = macd - signal
+                df[f"MACD_Hist_{fast_period}_{slow_period}"] = hist
             
             elif name == "BollingerBands":
                 period = params.get("period", 20)
                 std_dev = params.get("std_dev", 2)
                 
-                df[f"BB_Middle_{period}"] = df["Close"].rolling(window=period).mean()
-                std = df["Close"].rolling(window=period).std()
-                df[f"BB_Upper_{period}"] = df[f"BB_Middle_{period}"] + (std * std_dev)
-                df[f"BB_Lower_{period}"] = df[f"BB_Middle_{period}"] - (std * std_dev)
+                upper, middle, lower = _bollinger_bands(
+                    df["Close"].to_numpy(dtype=np.float64), period, float(std_dev)
+                )
+                df[f"BB_Middle_{period}"] = middle
+                df[f"BB_Upper_{period}"] = upper
+                df[f"BB_Lower_{period}"] = lower
         
         return df
     
@@ -207,6 +379,7 @@ class DataLoader:
             features = self.config.get("feature_engineering.statistical_features.features", [])
         
         df = data.copy()
+        close = df["Close"].to_numpy(dtype=np.float64)
         
         for feature in features:
             name = feature["name"]
@@ -214,16 +387,22 @@ class DataLoader:
             
             if name == "returns":
                 periods = params.get("periods", [1, 5, 10, 20])
-                for period in periods:
-                    df[f"Return_{period}d"] = df["Close"].pct_change(periods=period)
+                changes = _pct_change_multi(close, np.asarray(periods, dtype=np.int64))
+                for k, period in enumerate(periods):
+                    df[f"Return_{period}d"] = changes[:, k]
             
             elif name == "volatility":
                 window = params.get("window", 20)
-                df[f"Volatility_{window}d"] = df["Close"].pct_change().rolling(window=window).std()
+                volatility = np.full(close.shape[0], np.nan)
+                if close.shape[0] > 1:
+                    # The first return is undefined, so run the kernel from the second row
+                    volatility[1:] = _rolling_mean_std(close[1:] / close[:-1] - 1.0, window)[1]
+                df[f"Volatility_{window}d"] = volatility
             
             elif name == "momentum":
                 periods = params.get("periods", [5, 10, 20])
-                for period in periods:
-                    df[f"Momentum_{period}d"] = df["Close"] / df["Close"].shift(period) - 1
+                changes = _pct_change_multi(close, np.asarray(periods, dtype=np.int64))
+                for k, period in enumerate(periods):
+                    df[f"Momentum_{period}d"] = changes[:, k]
         
         return df 
\ No newline at end of file
@@ -7,7 +7,9 @@ setup(
     install_requires=[
         # Core ML & Data Science
         "numpy>=1.21.0",
+        "numba>=0.55.0",
         "pandas>=1.3.0",
+        "pyarrow>=5.0.0",
         "scikit-learn>=1.0.0",
         "scipy>=1.7.0",
         
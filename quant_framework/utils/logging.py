@@ -2,14 +2,263 @@
 Logging configuration for the quantitative finance framework.
 """
 
+import atexit
+import functools
+import gzip
+import io
+import itertools
 import os
+import queue
+import shutil
 import logging
-from logging.handlers import RotatingFileHandler
-from pathlib import Path
-from typing import Optional
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Any, Dict, Optional, Set
 
 from ..config import Config
 
+DEFAULT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# None of these fields appear in the framework's log format, so LogRecord can
+# skip looking them up. Without _srcfile, Logger skips the findCaller() stack walk;
+# %(filename)s / %(lineno)d then read "(unknown file)" / 0, so setup_logging()
+# restores it when the configured format asks for caller fields.
+logging.logThreads = False
+logging.logProcesses = False
+logging.logMultiprocessing = False
+_SRCFILE = logging._srcfile
+logging._srcfile = None
+_CALLER_FIELDS = ("%(pathname)", "%(filename)", "%(module)", "%(funcName)", "%(lineno)")
+
+# Logging section of the framework config, read once at import; see reload_config()
+_LOG_CONFIG: Dict[str, Any] = Config().get("logging", {})
+
+# One process-wide queue: SimpleQueue puts never block and take no Python-level
+# lock, and QueueHandler only ever uses put_nowait on it
+_LOG_QUEUE: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+_QUEUE_HANDLER = QueueHandler(_LOG_QUEUE)
+
+# Background thread that owns the file and console handlers
+_LISTENER: Optional[QueueListener] = None
+
+# Handlers are created once and reconfigured by later setup_logging() calls
+_file_handler: Optional["BufferedRotatingFileHandler"] = None
+_console_handler: Optional[logging.StreamHandler] = None
+
+# Settings the current handlers were built from; repeat setups with the same
+# settings keep them (and their buffered output) as they are
+_CURRENT_CONFIG: Optional[tuple] = None
+
+# Log directories already created by this process
+_MKDIR_DONE: Set[str] = set()
+
+# Whether DEBUG records pass the root level, rebound by setup_logging(). Read it
+# through debug_enabled() or as a module attribute (utils.logging.LOG_DEBUG_ENABLED);
+# `from ... import LOG_DEBUG_ENABLED` copies the value and never sees updates.
+LOG_DEBUG_ENABLED = False
+
+class SamplingFilter(logging.Filter):
+    """
+    Admit only every rate-th DEBUG record; INFO and above always pass.
+    """
+    
+    def __init__(self, rate: int):
+        super().__init__()
+        self.rate = rate
+        self._counter = itertools.count(1)
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG:
+            return True
+        return next(self._counter) % self.rate == 0
+
+class FastFormatter(logging.Formatter):
+    """
+    Formatter hard-wired to DEFAULT_FORMAT, skipping the %-style machinery.
+    """
+    
+    def format(self, record: logging.LogRecord) -> str:
+        record.message = record.getMessage()
+        record.asctime = self.formatTime(record, self.datefmt)
+        s = f"{record.asctime} - {record.name} - {record.levelname} - {record.message}"
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            s = f"{s}\n{record.exc_text}"
+        if record.stack_info:
+            s = f"{s}\n{self.formatStack(record.stack_info)}"
+        return s
+
+def _gzip_rotated(source: str, dest: str):
+    """Compress a rotated log file into dest and remove the original."""
+    with open(source, "rb") as f_in, gzip.open(dest, "wb", compresslevel=1) as f_out:
+        shutil.copyfileobj(f_in, f_out, 1024 * 1024)
+    os.remove(source)
+
+class BufferedRotatingFileHandler(RotatingFileHandler):
+    """
+    RotatingFileHandler that batches writes in a 64 KiB buffer.
+    
+    Records are only flushed immediately at WARNING and above; everything else
+    is flushed by a background thread every flush_interval seconds, and by
+    logging.shutdown() at interpreter exit. With compress=True, backups are
+    gzipped as .N.gz by a background thread after each rollover.
+    """
+    
+    def __init__(
+        self,
+        *args,
+        buffer_size: int = 64 * 1024,
+        flush_interval: float = 1.0,
+        compress: bool = False,
+        **kwargs
+    ):
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.compress = compress
+        self._gzip_thread: Optional[threading.Thread] = None
+        super().__init__(*args, **kwargs)
+        # Not `_closed`: logging.Handler uses that name for its own bool flag
+        self._stop_flusher = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        if flush_interval > 0:
+            self._flusher = threading.Thread(
+                target=self._flush_periodically,
+                args=(flush_interval,),
+                name="log-flusher",
+                daemon=True
+            )
+            self._flusher.start()
+    
+    def _open(self):
+        # Unbuffered file underneath so the BufferedWriter is the only buffer
+        raw = open(self.baseFilename, self.mode + "b", buffering=0)
+        # Rollover is decided from this running count instead of a seek/tell per record
+        self._fd = raw.fileno()
+        self._bytes_written = os.fstat(self._fd).st_size
+        buffered = io.BufferedWriter(raw, buffer_size=self.buffer_size)
+        return io.TextIOWrapper(buffered, encoding=self.encoding or "utf-8", errors=self.errors, write_through=True)
+    
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if self.stream is None:
+            self.stream = self._open()
+        if self.maxBytes > 0 and self._bytes_written >= self.maxBytes:
+            return os.path.isfile(self.baseFilename)
+        return False
+    
+    def emit(self, record: logging.LogRecord):
+        try:
+            if self.stream is None:
+                self.stream = self._open()
+            msg = self.format(record) + self.terminator
+            if self.maxBytes > 0 and self._bytes_written + len(msg) >= self.maxBytes:
+                if os.path.isfile(self.baseFilename):
+                    self.doRollover()
+                if self.stream is None:
+                    self.stream = self._open()
+            self.stream.write(msg)
+            # Characters, not encoded bytes; close enough for a size threshold
+            self._bytes_written += len(msg)
+            if record.levelno >= logging.WARNING:
+                self.flush()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+    
+    def rotation_filename(self, default_name: str) -> str:
+        name = super().rotation_filename(default_name)
+        return f"{name}.gz" if self.compress else name
+    
+    def rotate(self, source: str, dest: str):
+        if not self.compress:
+            super().rotate(source, dest)
+            return
+        # Only the rename happens on the logging thread; gzip runs in the background
+        plain = dest[:-len(".gz")]
+        os.rename(source, plain)
+        self._gzip_thread = threading.Thread(
+            target=_gzip_rotated,
+            args=(plain, dest),
+            name="log-gzip",
+            daemon=True
+        )
+        self._gzip_thread.start()
+    
+    def doRollover(self):
+        # The backup chain can only shift once the previous .1.gz is complete
+        if self._gzip_thread is not None:
+            self._gzip_thread.join()
+        super().doRollover()
+    
+    def _flush_periodically(self, interval: float):
+        while not self._stop_flusher.wait(interval):
+            # Never block on the lock: close() may hold it while joining this thread
+            if self.lock.acquire(blocking=False):
+                try:
+                    self.flush()
+                finally:
+                    self.lock.release()
+    
+    def write_bytes(self, buf: bytes):
+        """Append pre-encoded bytes to the file buffer, bypassing formatting."""
+        with self.lock:
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.buffer.write(buf)
+            self._bytes_written += len(buf)
+    
+    def fast_emit(self, buf: bytes):
+        """
+        Write pre-encoded bytes to the file descriptor with os.write.
+        
+        Skips the text and buffer layers: anything still buffered is flushed
+        first, then buf goes out in one write(2). That orders buf after
+        records this handler has already written, but not after records still
+        waiting in the logging queue; those land after buf. Rollover is not
+        checked here; the next regular record does that.
+        """
+        with self.lock:
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.flush()
+            view = memoryview(buf)
+            while view:
+                view = view[os.write(self._fd, view):]
+            self._bytes_written += len(buf)
+    
+    def close(self):
+        # Idempotent: logging.shutdown() may close a handler that was already closed
+        if self._stop_flusher.is_set():
+            return
+        self._stop_flusher.set()
+        if self._flusher is not None and self._flusher is not threading.current_thread():
+            self._flusher.join()
+        self.flush()
+        super().close()
+
+def _stop_listener():
+    """Stop the current listener, draining its queue; safe to call repeatedly."""
+    # QueueListener.stop() fails on a listener that is already stopped
+    if _LISTENER is not None and _LISTENER._thread is not None:
+        _LISTENER.stop()
+
+def reload_config() -> Dict[str, Any]:
+    """
+    Re-read config.yaml and refresh the cached logging section.
+    
+    Call setup_logging() afterwards for the new settings to take effect.
+    
+    Returns:
+        Dict[str, Any]: The reloaded logging configuration
+    """
+    global _LOG_CONFIG
+    config = Config()
+    config._load_config()
+    _LOG_CONFIG = config.get("logging", {})
+    return _LOG_CONFIG
+
 def setup_logging(log_file: Optional[str] = None):
     """
     Set up logging configuration for the framework.
@@ -17,19 +266,35 @@ def setup_logging(log_file: Optional[str] = None):
     Args:
         log_file: Optional path to log file. If None, uses config value.
     """
-    config = Config()
+    get_logger.cache_clear()
     
     # Get logging configuration
-    log_config = config.get("logging", {})
+    log_config = _LOG_CONFIG
     log_level = getattr(logging, log_config.get("level", "INFO"))
-    log_format = log_config.get("format", "%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    log_format = log_config.get("format", DEFAULT_FORMAT)
     
     # Create logs directory if it doesn't exist
     if log_file is None:
         log_file = log_config.get("file", "logs/quant_framework.log")
     
-    log_path = Path(log_file)
-    log_path.parent.mkdir(parents=True, exist_ok=True)
+    global _LISTENER, _CURRENT_CONFIG, _file_handler, _console_handler, LOG_DEBUG_ENABLED
+    config_key = (
+        log_file,
+        log_level,
+        log_format,
+        log_config.get("max_size"),
+        log_config.get("backup_count"),
+        log_config.get("flush_interval"),
+        log_config.get("compress"),
+        log_config.get("debug_sample_rate")
+    )
+    if _LISTENER is not None and config_key == _CURRENT_CONFIG:
+        return logging.getLogger()
+    
+    log_dir = os.path.dirname(log_file)
+    if log_dir and log_dir not in _MKDIR_DONE:
+        os.makedirs(log_dir, exist_ok=True)
+        _MKDIR_DONE.add(log_dir)
     
     # Configure root logger
     root_logger = logging.getLogger()
@@ -39,30 +304,140 @@ def setup_logging(log_file: Optional[str] = None):
     for handler in root_logger.handlers[:]:
         root_logger.removeHandler(handler)
     
+    # Drain the queue before the handlers are reconfigured
+    _stop_listener()
+    
+    logging._srcfile = _SRCFILE if any(field in log_format for field in _CALLER_FIELDS) else None
+    
     # Create formatter
-    formatter = logging.Formatter(log_format)
+    if log_format == DEFAULT_FORMAT:
+        formatter = FastFormatter(log_format)
+    else:
+        formatter = logging.Formatter(log_format)
     
-    # Add file handler
-    file_handler = RotatingFileHandler(
-        log_file,
-        maxBytes=log_config.get("max_size", 10 * 1024 * 1024),  # 10MB default
-        backupCount=log_config.get("backup_count", 5)
-    )
-    file_handler.setFormatter(formatter)
-    root_logger.addHandler(file_handler)
+    # Add file handler; only a new path or flush interval needs a new one
+    flush_interval = log_config.get("flush_interval", 1.0)
+    if (
+        _file_handler is None
+        or _file_handler.baseFilename != os.path.abspath(log_file)
+        or _file_handler.flush_interval != flush_interval
+    ):
+        if _file_handler is not None:
+            # Closing flushes whatever the old file still has buffered
+            _file_handler.close()
+        # delay=True: the file is opened by the first record, not at setup
+        _file_handler = BufferedRotatingFileHandler(
+            log_file,
+            maxBytes=log_config.get("max_size", DEFAULT_MAX_BYTES),  # 64MB default
+            backupCount=log_config.get("backup_count", 5),
+            flush_interval=flush_interval,
+            compress=log_config.get("compress", False),
+            delay=True
+        )
+    else:
+        _file_handler.maxBytes = log_config.get("max_size", DEFAULT_MAX_BYTES)
+        _file_handler.backupCount = log_config.get("backup_count", 5)
+        _file_handler.compress = log_config.get("compress", False)
+    _file_handler.setFormatter(formatter)
+    
+    # Thin out high-frequency debug records before they are formatted and written
+    for existing in _file_handler.filters[:]:
+        if isinstance(existing, SamplingFilter):
+            _file_handler.removeFilter(existing)
+    debug_sample_rate = log_config.get("debug_sample_rate", 1)
+    if debug_sample_rate > 1:
+        _file_handler.addFilter(SamplingFilter(debug_sample_rate))
+    
+    # Add console handler. It stays on sys.stderr: on a TTY that stream is
+    # already line-buffered, StreamHandler flushes every record regardless of
+    # the stream's buffering, and a private fd-2 stream would bypass
+    # redirect_stderr / pytest capture. Console volume is cut by levels instead.
+    if _console_handler is None:
+        _console_handler = logging.StreamHandler()
+    _console_handler.setFormatter(formatter)
+    
+    # Callers only enqueue records; one listener thread does the formatting and I/O
+    root_logger.addHandler(_QUEUE_HANDLER)
+    if _LISTENER is None:
+        # Drain whatever listener is current at exit, before logging.shutdown()
+        atexit.register(_stop_listener)
+    _LISTENER = QueueListener(_LOG_QUEUE, _file_handler, _console_handler, respect_handler_level=True)
+    _LISTENER.start()
+    _CURRENT_CONFIG = config_key
+    LOG_DEBUG_ENABLED = log_level <= logging.DEBUG
+    
+    # Set logging levels for specific modules; they enqueue directly instead of
+    # propagating, so their records never walk up to the root logger
+    for name in ("urllib3", "matplotlib", "tensorflow"):
+        library_logger = logging.getLogger(name)
+        library_logger.setLevel(logging.WARNING)
+        library_logger.propagate = False
+        for handler in library_logger.handlers[:]:
+            if isinstance(handler, (QueueHandler, logging.NullHandler)):
+                library_logger.removeHandler(handler)
+        library_logger.addHandler(_QUEUE_HANDLER)
     
-    # Add console handler
-    console_handler = logging.StreamHandler()
-    console_handler.setFormatter(formatter)
-    root_logger.addHandler(console_handler)
+    # Make sure no global logging.disable() level shadows the per-logger levels
+    logging.disable(logging.NOTSET)
     
-    # Set logging levels for specific modules
-    logging.getLogger("urllib3").setLevel(logging.WARNING)
-    logging.getLogger("matplotlib").setLevel(logging.WARNING)
-    logging.getLogger("tensorflow").setLevel(logging.WARNING)
+    # disable() just emptied every logger's level cache; refill it for the common
+    # levels so first calls don't walk the parent chain
+    loggers = [root_logger, *logging.Logger.manager.loggerDict.values()]
+    for existing in loggers:
+        if isinstance(existing, logging.Logger):
+            existing.isEnabledFor(logging.DEBUG)
+            existing.isEnabledFor(logging.INFO)
     
     return root_logger
 
+def debug_enabled() -> bool:
+    """
+    Whether DEBUG records currently pass the root level.
+    
+    Returns:
+        bool: The LOG_DEBUG_ENABLED value captured by the latest setup_logging()
+    """
+    return LOG_DEBUG_ENABLED
+
+def log_bytes_unsafe(buf: bytes):
+    """
+    Write pre-formatted bytes straight into the log file's buffer.
+    
+    Skips levels, filters, formatting and the queue entirely, so callers are
+    responsible for the record layout (including the trailing newline) and for
+    checking debug_enabled() themselves. Meant for hot loops that build their
+    record bytes once and reuse them. Does nothing before setup_logging().
+    
+    Ordering is only guaranteed against records the listener has already
+    taken off the queue: anything logged earlier but still queued is written
+    after these bytes.
+    
+    Args:
+        buf: Encoded record bytes
+    """
+    handler = _file_handler
+    if handler is not None:
+        handler.write_bytes(buf)
+
+def _raw_log(header: bytes, payload: bytes):
+    """
+    Write header + payload + newline to the log file in a single write(2).
+    
+    For drivers such as the Monte Carlo loop that preformat their records as
+    bytes once and write them in batches; as with log_bytes_unsafe, levels,
+    filters and formatting are the caller's job, and records still in the
+    logging queue are written after these bytes. Does nothing before
+    setup_logging().
+    
+    Args:
+        header: Encoded record prefix (timestamp, level, logger name, ...)
+        payload: Encoded record body
+    """
+    handler = _file_handler
+    if handler is not None:
+        handler.fast_emit(b"".join((header, payload, b"\n")))
+
+@functools.lru_cache(maxsize=256)
 def get_logger(name: str) -> logging.Logger:
     """
     Get a logger instance for a specific module.